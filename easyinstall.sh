@@ -2288,18 +2288,49 @@ setup_backups() {
     
     cat > /usr/local/bin/easy-backup <<'EOF'
 #!/bin/bash
+# Usage: easy-backup [--output FILE|-] [daily|weekly|monthly]
+
+OUTPUT=""
+if [ "$1" = "--output" ]; then
+    OUTPUT="$2"
+    shift 2
+    # Runs as root and can be reached from the WebUI, so only stdout or the
+    # backup/WebUI staging directories are valid targets
+    if [ "$OUTPUT" != "-" ]; then
+        case "$(realpath -m -- "$OUTPUT")" in
+            /backups/*|/tmp/easyinstall-webui/*) ;;
+            *)
+                echo "Invalid --output: must be -, /backups/... or /tmp/easyinstall-webui/..." >&2
+                exit 1
+                ;;
+        esac
+    fi
+fi
 
 BACKUP_TYPE="${1:-weekly}"
 BACKUP_DIR="/backups/$BACKUP_TYPE"
 DATE=$(date +%Y%m%d-%H%M%S)
-BACKUP_FILE="$BACKUP_DIR/backup-$DATE.tar.gz"
+BACKUP_FILE="${OUTPUT:-$BACKUP_DIR/backup-$DATE.tar.gz}"
 MYSQL_CNF="/root/.my.cnf"
 
-mkdir -p "$BACKUP_DIR"
+# With --output - the archive goes to stdout, so messages go to stderr
+log() { echo "$@" >&2; }
+
+[ -z "$OUTPUT" ] && mkdir -p "$BACKUP_DIR"
 
-echo "Creating $BACKUP_TYPE backup: $BACKUP_FILE"
+log "Creating $BACKUP_TYPE backup: $BACKUP_FILE"
 
-tar -czf "$BACKUP_FILE" \
+# Dump databases first so everything goes into one compressed archive
+MYSQL_DUMP=""
+if command -v mysqldump >/dev/null 2>&1; then
+    MYSQL_DUMP="/backups/mysql-$DATE.sql"
+    mysqldump --defaults-file="$MYSQL_CNF" --all-databases > "$MYSQL_DUMP" 2>/dev/null || {
+        rm -f "$MYSQL_DUMP"
+        MYSQL_DUMP=""
+    }
+fi
+
+tar -czf "$BACKUP_FILE" --ignore-failed-read \
     /var/www/html \
     /etc/nginx \
     /etc/php \
@@ -2307,18 +2338,22 @@ tar -czf "$BACKUP_FILE" \
     /etc/redis \
     /etc/fail2ban \
     /etc/modsecurity \
-    2>/dev/null || true
+    $MYSQL_DUMP \
+    2>/dev/null
+TAR_STATUS=$?
 
-if command -v mysqldump >/dev/null 2>&1; then
-    mysqldump --defaults-file="$MYSQL_CNF" --all-databases > "/backups/mysql-$DATE.sql" 2>/dev/null
-    tar -rf "$BACKUP_FILE" "/backups/mysql-$DATE.sql" 2>/dev/null
-    rm "/backups/mysql-$DATE.sql" 2>/dev/null
+[ -n "$MYSQL_DUMP" ] && rm -f "$MYSQL_DUMP"
+
+# tar exits 1 when files changed while being read; anything above is fatal
+if [ "$TAR_STATUS" -gt 1 ]; then
+    log "Backup failed: tar exited with $TAR_STATUS"
+    exit 1
 fi
 
-echo "Backup completed: $BACKUP_FILE"
-echo "Size: $(du -h "$BACKUP_FILE" | cut -f1)"
+log "Backup completed: $BACKUP_FILE"
+[ "$BACKUP_FILE" != "-" ] && log "Size: $(du -h "$BACKUP_FILE" | cut -f1)"
 
-if [ "$BACKUP_TYPE" = "weekly" ]; then
+if [ -z "$OUTPUT" ] && [ "$BACKUP_TYPE" = "weekly" ]; then
     ls -t $BACKUP_DIR/backup-* 2>/dev/null | tail -n +3 | xargs rm -f 2>/dev/null || true
 fi
 EOF
@@ -2905,6 +2940,7 @@ show_help() {
     echo -e "${CYAN}🔧 SYSTEM${NC}"
     echo "  easyinstall update                              - Update system"
     echo "  easyinstall clean                               - Clean temp files"
+    echo "  easyinstall user create-admin                   - Reset WebUI admin password"
     echo "  easyinstall help                                - Show this help"
     echo ""
     echo -e "${PURPLE}══════════════════════════════════════════════════════${NC}"
@@ -3026,7 +3062,7 @@ case "$MAIN_COMMAND" in
         ;;
         
     backup)
-        /usr/local/bin/easy-backup "${2:-weekly}"
+        /usr/local/bin/easy-backup "${@:2}"
         ;;
         
     restore)
@@ -3169,6 +3205,17 @@ case "$MAIN_COMMAND" in
         echo -e "${GREEN}✅ System updated${NC}"
         ;;
         
+    user)
+        case "$2" in
+            create-admin)
+                WEBUI_PYTHON=/opt/easyinstall-venv/bin/python3
+                [ -x "$WEBUI_PYTHON" ] || WEBUI_PYTHON=python3
+                cd /opt/easyinstall-webui/app && "$WEBUI_PYTHON" app.py create-admin
+                ;;
+            *) echo "Usage: easyinstall user create-admin" ;;
+        esac
+        ;;
+        
     help)
         show_help
         ;;
@@ -3745,7 +3792,7 @@ main() {
                 ;;
             *)
                 # If we have arguments that look like commands, don't run full installation
-                if [[ "$1" =~ ^(domain|create|site|xmlrpc|ssl|backup|restore|remote|status|report|monitor|telegram|logs|cache|redis|memcached|keys|fail2ban|waf|cdn|site-manager|restart|clean|update|help)$ ]]; then
+                if [[ "$1" =~ ^(domain|create|site|xmlrpc|ssl|backup|restore|remote|status|report|monitor|telegram|logs|cache|redis|memcached|keys|fail2ban|waf|cdn|site-manager|restart|clean|update|user|help)$ ]]; then
                     # Command will be handled by easyinstall script after installation
                     # We need to ensure easyinstall is installed first
                     if [ ! -f /usr/local/bin/easyinstall ]; then
@@ -113,8 +113,11 @@ pip install --upgrade pip
 pip install \
     flask \
     flask-socketio \
+    flask-session \
     flask-login \
-    bcrypt \
+    "bcrypt<4.1" \
+    passlib \
+    argon2-cffi \
     paramiko \
     boto3 \
     google-auth \
@@ -122,6 +125,7 @@ pip install \
     google-auth-httplib2 \
     googleapiclient \
     redis \
+    orjson \
     gunicorn \
     eventlet \
     python-dotenv \
@@ -190,7 +194,7 @@ cat > /usr/local/bin/webui-launcher <<'EOF'
 #!/bin/bash
 source /opt/easyinstall-venv/bin/activate
 cd /opt/easyinstall-webui/app
-exec gunicorn -w 4 -k eventlet -b 127.0.0.1:5000 app:app
+exec gunicorn -w 1 -k eventlet -b 127.0.0.1:5000 app:app
 EOF
 chmod +x /usr/local/bin/webui-launcher
 
@@ -3,35 +3,70 @@
 EasyInstall WebUI - Enterprise Management Interface
 """
 
+# Patch blocking I/O before anything else is imported so subprocess calls,
+# sockets and sleeps yield to the eventlet hub instead of stalling it
+import eventlet
+eventlet.monkey_patch()
+
 import os
 import sys
-import json
 import subprocess
 import threading
 import time
+import math
 import hashlib
+import hmac
 import secrets
+import shutil
+import uuid
+import queue
+import atexit
+import multiprocessing
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from functools import wraps
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, send_file
-from flask_socketio import SocketIO, emit
+from functools import wraps, lru_cache
+from flask import Flask, render_template, request, jsonify, Response, session, redirect, url_for, flash, send_file
+from flask_session import Session
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import paramiko
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 import redis
+import orjson
 import logging
 from logging.handlers import RotatingFileHandler
 import sqlite3
-import bcrypt
+from passlib.context import CryptContext
+from passlib.hash import bcrypt as bcrypt_hasher
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = secrets.token_hex(32)
-app.config['SESSION_TYPE'] = 'filesystem'
+app.config['SESSION_TYPE'] = 'redis'
+app.config['SESSION_REDIS'] = redis.Redis(host='localhost', port=6379, db=1)
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=8)
-socketio = SocketIO(app, cors_allowed_origins="*")
+# Browser-session cookies unless "remember" marks the session permanent
+app.config['SESSION_PERMANENT'] = False
+Session(app)
+
+class OrjsonCodec:
+    """json module stand-in for Socket.IO packets, backed by orjson"""
+    
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        return orjson.dumps(obj).decode('utf-8')
+    
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return orjson.loads(s)
+
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet', json=OrjsonCodec)
 
 # Configuration
 CONFIG_DIR = '/etc/easyinstall/webui'
@@ -55,112 +90,429 @@ logging.basicConfig(
 )
 logger = logging.getLogger('EasyInstallWebUI')
 
+# Redis cache
+redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+ROLE_CACHE_TTL = 300
+LOGIN_CACHE_TTL = 300
+
+def cache_get(key):
+    """Get a cached value, None on miss or if Redis is unavailable"""
+    try:
+        return redis_client.get(key)
+    except redis.RedisError as e:
+        logger.debug(f"Redis get failed for {key}: {e}")
+        return None
+
+def cache_set(key, ttl, value):
+    """Cache a value with a TTL in seconds"""
+    try:
+        redis_client.setex(key, ttl, value)
+    except redis.RedisError as e:
+        logger.debug(f"Redis set failed for {key}: {e}")
+
+def cache_delete(*keys):
+    """Drop cached values"""
+    try:
+        redis_client.delete(*keys)
+    except redis.RedisError as e:
+        logger.debug(f"Redis delete failed for {keys}: {e}")
+
+def jsonify_fast(obj):
+    """jsonify() replacement that serializes with orjson"""
+    return Response(orjson.dumps(obj), mimetype='application/json')
+
+# Password hashing - the first scheme hashes new passwords, the others are
+# still accepted and upgraded on the next successful login
+BCRYPT_TARGET_SECONDS = 0.1
+
+def calibrate_bcrypt_cost(target=BCRYPT_TARGET_SECONDS, minimum=10, maximum=14):
+    """Pick the highest bcrypt cost that hashes within target seconds on this host"""
+    start = time.perf_counter()
+    bcrypt_hasher.using(rounds=minimum).hash('calibration')
+    elapsed = time.perf_counter() - start
+    
+    # Each extra round doubles the work
+    cost = minimum
+    while cost < maximum and elapsed * 2 <= target:
+        cost += 1
+        elapsed *= 2
+    return cost
+
+_cost = os.environ.get('EASYINSTALL_BCRYPT_COST', '10')
+BCRYPT_COST = calibrate_bcrypt_cost() if _cost == 'auto' else int(_cost)
+PASSWORD_SCHEMES = [s.strip() for s in os.environ.get('EASYINSTALL_PASSWORD_SCHEMES', 'bcrypt').split(',')]
+if 'bcrypt' not in PASSWORD_SCHEMES:
+    PASSWORD_SCHEMES.append('bcrypt')
+pwd_context = CryptContext(schemes=PASSWORD_SCHEMES, deprecated='auto', bcrypt__rounds=BCRYPT_COST)
+
+# Hashing is pure CPU, so run it in worker processes instead of
+# blocking the request worker. Workers are forked: spawn/forkserver would
+# re-import this module, whose init_db() hashes again on a fresh database
+BCRYPT_POOL = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                  mp_context=multiprocessing.get_context('fork'))
+
+_BCRYPT_POOL_PID = os.getpid()
+
+def _shutdown_bcrypt_pool():
+    """Shut down the bcrypt pool from the process that created it"""
+    # Forked workers inherit this hook and must not wait on their own pool
+    if os.getpid() == _BCRYPT_POOL_PID:
+        BCRYPT_POOL.shutdown()
+
+# Under eventlet the concurrent.futures exit hook hangs on a pool that has
+# run tasks, so shut ours down first. Threading exit hooks run in reverse
+# order before atexit; a plain atexit handler would come too late.
+threading._register_atexit(_shutdown_bcrypt_pool)
+
+def _hash(password):
+    return pwd_context.hash(password)
+
+def _verify(password, password_hash):
+    return pwd_context.verify(password, password_hash)
+
+def hash_password(password):
+    """Hash a password on the bcrypt pool"""
+    return BCRYPT_POOL.submit(_hash, password).result()
+
+def verify_password(password, password_hash):
+    """Check a password against its hash on the bcrypt pool"""
+    return BCRYPT_POOL.submit(_verify, password, password_hash).result()
+
 # Database setup
 DB_PATH = f'{DATA_DIR}/users.db'
 
+# SQL statements - kept as constants so every call site shares one
+# entry in the connection's prepared statement cache
+_Q_USER_ROLE = "SELECT role FROM users WHERE id = ?"
+_Q_USER_BY_NAME = "SELECT id, password_hash, role FROM users WHERE username = ?"
+_Q_USER_LAST_LOGIN = "UPDATE users SET last_login = ? WHERE id = ?"
+_Q_USER_PASSWORD = "UPDATE users SET password_hash = ? WHERE id = ?"
+_Q_USERS = "SELECT id, username, email, role, created_at, last_login FROM users"
+_Q_USER_INSERT = "INSERT INTO users (username, password_hash, email, role) VALUES (?, ?, ?, ?)"
+_Q_USER_DELETE = "DELETE FROM users WHERE id = ?"
+_Q_ADMIN_UPSERT = ("INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?) "
+                   "ON CONFLICT(username) DO UPDATE SET password_hash = excluded.password_hash, "
+                   "role = excluded.role")
+_Q_DOMAINS_ACTIVE = "SELECT domain, type, ssl_enabled, created_at FROM domains WHERE status = 'active'"
+_Q_DOMAINS = "SELECT * FROM domains ORDER BY created_at DESC"
+_Q_DOMAIN_INSERT = "INSERT INTO domains (domain, type, php_version, ssl_enabled, user_id) VALUES (?, ?, ?, ?, ?)"
+_Q_DOMAIN_SSL = "UPDATE domains SET ssl_enabled = 1 WHERE domain = ?"
+_Q_DOMAIN_DELETE = "UPDATE domains SET status = 'deleted' WHERE domain = ?"
+_Q_CREDS_DEFAULT = "SELECT credentials FROM cloud_credentials WHERE user_id = ? AND is_default = 1"
+_Q_CREDS_BY_PROVIDER = "SELECT credentials FROM cloud_credentials WHERE user_id = ? AND provider = ?"
+_Q_CREDS_CLEAR_DEFAULT = "UPDATE cloud_credentials SET is_default = 0 WHERE user_id = ?"
+_Q_CREDS_SAVE = ("INSERT OR REPLACE INTO cloud_credentials (user_id, provider, credentials, name, is_default) "
+                 "VALUES (?, ?, ?, ?, ?)")
+_Q_JOB_DESTINATION = "SELECT destination FROM backup_jobs WHERE id = ?"
+_Q_JOBS = "SELECT * FROM backup_jobs WHERE user_id = ? ORDER BY created_at DESC"
+_Q_JOB_INSERT = ("INSERT INTO backup_jobs (name, type, source, destination, schedule, retention_days, user_id) "
+                 "VALUES (?, ?, ?, ?, ?, ?, ?)")
+_Q_HISTORY = "SELECT * FROM backup_history ORDER BY start_time DESC LIMIT 50"
+_Q_HISTORY_INSERT = ("INSERT INTO backup_history (job_id, start_time, end_time, size, status, location) "
+                     "VALUES (?, ?, ?, ?, ?, ?)")
+_Q_SETTINGS = "SELECT key, value FROM settings"
+_Q_SETTING_SAVE = "INSERT OR REPLACE INTO settings (key, value, updated_at) VALUES (?, ?, ?)"
+
+# Connection pools - read-only connections are pooled, writes go through a
+# single connection so they never contend with each other for the lock
+_READERS = queue.LifoQueue(maxsize=os.cpu_count() or 4)
+_writer = None
+_writer_lock = threading.Lock()
+
+# Applied once to every new connection
+_PRAGMAS = '''
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA busy_timeout=5000;
+PRAGMA temp_store=MEMORY;
+PRAGMA mmap_size=268435456;
+PRAGMA cache_size=-20000;
+PRAGMA foreign_keys=ON;
+PRAGMA wal_autocheckpoint=1000;
+'''
+
+def _connect(readonly=False):
+    """Open a new SQLite connection"""
+    if readonly:
+        conn = sqlite3.connect(f'file:{DB_PATH}?mode=ro', uri=True, check_same_thread=False,
+                               isolation_level=None, cached_statements=256)
+    else:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None,
+                               cached_statements=256)
+    conn.executescript(_PRAGMAS)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _get_writer():
+    """Get the writer connection; caller must hold _writer_lock"""
+    global _writer
+    if _writer is None:
+        _writer = _connect()
+    return _writer
+
+@contextmanager
+def db_read():
+    """Check out a pooled read-only connection"""
+    try:
+        conn = _READERS.get_nowait()
+    except queue.Empty:
+        conn = _connect(readonly=True)
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            _READERS.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+@contextmanager
+def db_write():
+    """Run statements in one write transaction on the writer connection"""
+    with _writer_lock:
+        conn = _get_writer()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+def _close_db():
+    """Close all database connections"""
+    while True:
+        try:
+            _READERS.get_nowait().close()
+        except queue.Empty:
+            break
+    with _writer_lock:
+        if _writer is not None:
+            # Refresh planner statistics for tables that changed this run
+            _writer.execute('PRAGMA optimize')
+            _writer.close()
+
+atexit.register(_close_db)
+
+# Schema - created in a single transaction
+SCHEMA = '''
+BEGIN IMMEDIATE;
+
+-- Users table
+CREATE TABLE IF NOT EXISTS users
+    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+     username TEXT UNIQUE NOT NULL,
+     password_hash TEXT NOT NULL,
+     email TEXT,
+     role TEXT DEFAULT 'admin',
+     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+     last_login TIMESTAMP,
+     twofa_secret TEXT,
+     twofa_enabled BOOLEAN DEFAULT 0);
+
+-- Sessions table
+CREATE TABLE IF NOT EXISTS sessions
+    (id TEXT PRIMARY KEY,
+     user_id INTEGER,
+     expires TIMESTAMP,
+     ip_address TEXT,
+     user_agent TEXT,
+     FOREIGN KEY(user_id) REFERENCES users(id));
+
+-- Cloud credentials table
+CREATE TABLE IF NOT EXISTS cloud_credentials
+    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+     user_id INTEGER,
+     provider TEXT NOT NULL,
+     credentials TEXT NOT NULL,
+     name TEXT,
+     is_default BOOLEAN DEFAULT 0,
+     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+     FOREIGN KEY(user_id) REFERENCES users(id));
+
+-- Backup jobs table
+CREATE TABLE IF NOT EXISTS backup_jobs
+    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+     name TEXT NOT NULL,
+     type TEXT NOT NULL,
+     source TEXT,
+     destination TEXT,
+     schedule TEXT,
+     retention_days INTEGER DEFAULT 30,
+     last_run TIMESTAMP,
+     next_run TIMESTAMP,
+     status TEXT DEFAULT 'active',
+     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+     user_id INTEGER,
+     FOREIGN KEY(user_id) REFERENCES users(id));
+
+-- Backup history table
+CREATE TABLE IF NOT EXISTS backup_history
+    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+     job_id INTEGER,
+     start_time TIMESTAMP,
+     end_time TIMESTAMP,
+     size INTEGER,
+     status TEXT,
+     message TEXT,
+     location TEXT,
+     FOREIGN KEY(job_id) REFERENCES backup_jobs(id));
+
+-- Domains table
+CREATE TABLE IF NOT EXISTS domains
+    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+     domain TEXT UNIQUE NOT NULL,
+     type TEXT NOT NULL,
+     status TEXT DEFAULT 'active',
+     php_version TEXT,
+     ssl_enabled BOOLEAN DEFAULT 0,
+     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+     user_id INTEGER,
+     FOREIGN KEY(user_id) REFERENCES users(id));
+
+-- Settings table
+CREATE TABLE IF NOT EXISTS settings
+    (key TEXT PRIMARY KEY,
+     value TEXT,
+     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+
+-- Indexes for ORDER BY ... DESC listings (users.username and settings.key
+-- are already indexed through UNIQUE / PRIMARY KEY)
+CREATE INDEX IF NOT EXISTS idx_domains_created ON domains(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_backup_history_start ON backup_history(start_time DESC);
+
+COMMIT;
+'''
+
 def init_db():
     """Initialize SQLite database"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # Users table
-    c.execute('''CREATE TABLE IF NOT EXISTS users
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  username TEXT UNIQUE NOT NULL,
-                  password_hash TEXT NOT NULL,
-                  email TEXT,
-                  role TEXT DEFAULT 'admin',
-                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                  last_login TIMESTAMP,
-                  twofa_secret TEXT,
-                  twofa_enabled BOOLEAN DEFAULT 0)''')
-    
-    # Sessions table
-    c.execute('''CREATE TABLE IF NOT EXISTS sessions
-                 (id TEXT PRIMARY KEY,
-                  user_id INTEGER,
-                  expires TIMESTAMP,
-                  ip_address TEXT,
-                  user_agent TEXT,
-                  FOREIGN KEY(user_id) REFERENCES users(id))''')
-    
-    # Cloud credentials table
-    c.execute('''CREATE TABLE IF NOT EXISTS cloud_credentials
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  user_id INTEGER,
-                  provider TEXT NOT NULL,
-                  credentials TEXT NOT NULL,
-                  name TEXT,
-                  is_default BOOLEAN DEFAULT 0,
-                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                  FOREIGN KEY(user_id) REFERENCES users(id))''')
-    
-    # Backup jobs table
-    c.execute('''CREATE TABLE IF NOT EXISTS backup_jobs
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  name TEXT NOT NULL,
-                  type TEXT NOT NULL,
-                  source TEXT,
-                  destination TEXT,
-                  schedule TEXT,
-                  retention_days INTEGER DEFAULT 30,
-                  last_run TIMESTAMP,
-                  next_run TIMESTAMP,
-                  status TEXT DEFAULT 'active',
-                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                  user_id INTEGER,
-                  FOREIGN KEY(user_id) REFERENCES users(id))''')
-    
-    # Backup history table
-    c.execute('''CREATE TABLE IF NOT EXISTS backup_history
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  job_id INTEGER,
-                  start_time TIMESTAMP,
-                  end_time TIMESTAMP,
-                  size INTEGER,
-                  status TEXT,
-                  message TEXT,
-                  location TEXT,
-                  FOREIGN KEY(job_id) REFERENCES backup_jobs(id))''')
-    
-    # Domains table
-    c.execute('''CREATE TABLE IF NOT EXISTS domains
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  domain TEXT UNIQUE NOT NULL,
-                  type TEXT NOT NULL,
-                  status TEXT DEFAULT 'active',
-                  php_version TEXT,
-                  ssl_enabled BOOLEAN DEFAULT 0,
-                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                  user_id INTEGER,
-                  FOREIGN KEY(user_id) REFERENCES users(id))''')
-    
-    # Settings table
-    c.execute('''CREATE TABLE IF NOT EXISTS settings
-                 (key TEXT PRIMARY KEY,
-                  value TEXT,
-                  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    
-    # Create default admin user if not exists
-    default_password = secrets.token_urlsafe(12)
-    password_hash = bcrypt.hashpw(default_password.encode('utf-8'), bcrypt.gensalt())
+    with _writer_lock:
+        _get_writer().executescript(SCHEMA)
     
-    try:
-        c.execute("INSERT OR IGNORE INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-                 ('admin', password_hash, 'admin'))
-        conn.commit()
-        
-        # Save default password to file
-        with open(f'{DATA_DIR}/admin_credentials.txt', 'w') as f:
-            f.write(f"Username: admin\nPassword: {default_password}\n")
-        os.chmod(f'{DATA_DIR}/admin_credentials.txt', 0o600)
-    except:
-        pass
+    with db_read() as conn:
+        has_admin = conn.execute(_Q_USER_BY_NAME, ('admin',)).fetchone()
+    
+    # Only the first start pays for hashing a default password
+    if not has_admin:
+        create_admin()
+
+def create_admin():
+    """Create the admin user, or reset its password, and save the credentials"""
+    password = secrets.token_urlsafe(12)
+    password_hash = hash_password(password)
+    
+    with db_write() as conn:
+        conn.execute(_Q_ADMIN_UPSERT, ('admin', password_hash, 'admin'))
     
-    conn.close()
+    # Save password to file
+    with open(f'{DATA_DIR}/admin_credentials.txt', 'w') as f:
+        f.write(f"Username: admin\nPassword: {password}\n")
+    os.chmod(f'{DATA_DIR}/admin_credentials.txt', 0o600)
+    
+    return password
 
 init_db()
 
+# ============================================
+# System Helpers
+# ============================================
+
+# Resolved once so each call execs the binary directly instead of searching PATH
+_EASYINSTALL = shutil.which('easyinstall') or 'easyinstall'
+_SYSTEMCTL = shutil.which('systemctl') or 'systemctl'
+
+# Subcommands accepted by easyinstall (see main() in easyinstall.sh); 'user'
+# is left out because it manages WebUI accounts and is CLI-only
+_ALLOWED_CMDS = frozenset([
+    'domain', 'create', 'site', 'xmlrpc', 'ssl', 'backup', 'restore', 'remote',
+    'status', 'report', 'monitor', 'telegram', 'logs', 'cache', 'redis',
+    'memcached', 'keys', 'fail2ban', 'waf', 'cdn', 'site-manager', 'restart',
+    'clean', 'update', 'help',
+])
+
+# 'backup' only takes a rotation type here; --output would let the caller
+# choose where root writes the archive, or stream it into the job output
+_BACKUP_TYPES = frozenset(['daily', 'weekly', 'monthly'])
+
+# Monitored services; globs are expanded to unit names by resolve_services()
+SERVICES = ['nginx', 'mariadb', 'redis-server', 'memcached', 'fail2ban', 'php*-fpm']
+
+@lru_cache(maxsize=None)
+def resolve_services():
+    """Expand service globs to installed unit names (systemctl is-active does not)"""
+    units = []
+    for service in SERVICES:
+        if '*' not in service:
+            units.append(service)
+            continue
+        try:
+            result = subprocess.run([_SYSTEMCTL, 'list-units', '--type=service', '--all',
+                                     '--no-legend', '--plain', f'{service}.service'],
+                                    capture_output=True, text=True)
+            matches = [line.split()[0].removesuffix('.service')
+                       for line in result.stdout.splitlines() if line.strip()]
+        except OSError:
+            matches = []
+        units.extend(matches or [service])
+    return tuple(units)
+
+BACKUP_STATS_TTL = 30
+STATUS_CACHE_TTL = 5
+
+def walk_scandir(path):
+    """Recursively yield file DirEntry objects under path, skipping hidden dirs"""
+    # Like os.walk, skip directories and files that vanish or can't be read
+    # (backup rotation may delete them mid-scan)
+    try:
+        it = os.scandir(path)
+    except OSError:
+        return
+    with it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith('.'):
+                        yield from walk_scandir(entry.path)
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                # DirEntry caches this, so callers' entry.stat() can't fail
+                entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            yield entry
+
+def get_backup_stats():
+    """Get backup count and total size, cached in Redis"""
+    key = f'backup_stats:{BACKUP_DIR}'
+    cached = cache_get(key)
+    if cached:
+        return orjson.loads(cached)
+    
+    stats = {'count': 0, 'size': 0}
+    for entry in walk_scandir(BACKUP_DIR):
+        stats['count'] += 1
+        stats['size'] += entry.stat().st_size
+    
+    cache_set(key, BACKUP_STATS_TTL, orjson.dumps(stats))
+    return stats
+
+def _human(n):
+    """Format a byte count like df -h"""
+    for unit in ('B', 'K', 'M', 'G', 'T'):
+        if n < 1024:
+            break
+        n /= 1024
+    else:
+        unit = 'P'
+    # df rounds up: one decimal below 10, whole units above
+    if unit != 'B' and n < 10:
+        n = math.ceil(n * 10) / 10
+        if n < 10:
+            return f'{n:.1f}{unit}'
+    return f'{math.ceil(n)}{unit}'
+
 # ============================================
 # Authentication Decorators
 # ============================================
@@ -173,17 +525,52 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def get_user_role(user_id):
+    """Get user role, cached in Redis"""
+    role = cache_get(f'role:{user_id}')
+    if role is not None:
+        return role
+    
+    with db_read() as conn:
+        c = conn.cursor()
+        c.execute(_Q_USER_ROLE, (user_id,))
+        result = c.fetchone()
+    if not result:
+        return None
+    
+    cache_set(f'role:{user_id}', ROLE_CACHE_TTL, result['role'])
+    return result['role']
+
+def _login_token(username, password, password_hash):
+    """HMAC of verified credentials, bound to the stored hash"""
+    if isinstance(password_hash, str):
+        password_hash = password_hash.encode('utf-8')
+    message = f'{username}:{password}:'.encode('utf-8') + password_hash
+    return hmac.new(app.config['SECRET_KEY'].encode('utf-8'), message, 'sha256').hexdigest()
+
+def check_login(username, password, password_hash):
+    """Verify password, skipping the hash check for recently verified credentials"""
+    # The token covers the stored hash, so a password change or a
+    # re-created account never matches an old cache entry
+    token = _login_token(username, password, password_hash)
+    cached = cache_get(f'pwok:{username}')
+    if cached and hmac.compare_digest(cached, token):
+        return True
+    
+    if not verify_password(password, password_hash):
+        return False
+    
+    cache_set(f'pwok:{username}', LOGIN_CACHE_TTL, token)
+    return True
+
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
             return jsonify({'error': 'Authentication required'}), 401
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute("SELECT role FROM users WHERE id = ?", (session['user_id'],))
-        result = c.fetchone()
-        conn.close()
-        if not result or result[0] != 'admin':
+        # Always check the (Redis-cached) stored role, so deleting a user
+        # revokes admin rights on their next request
+        if get_user_role(session['user_id']) != 'admin':
             return jsonify({'error': 'Admin privileges required'}), 403
         return f(*args, **kwargs)
     return decorated_function
@@ -207,12 +594,10 @@ def login():
         password = request.form.get('password')
         remember = request.form.get('remember', False)
         
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute("SELECT id, password_hash, role FROM users WHERE username = ?", (username,))
-        user = c.fetchone()
+        with db_read() as conn:
+            user = conn.execute(_Q_USER_BY_NAME, (username,)).fetchone()
         
-        if user and bcrypt.checkpw(password.encode('utf-8'), user[1]):
+        if user and check_login(username, password, user['password_hash']):
             session['user_id'] = user[0]
             session['username'] = username
             session['role'] = user[2]
@@ -220,17 +605,22 @@ def login():
             if remember:
                 session.permanent = True
             
-            # Update last login
-            c.execute("UPDATE users SET last_login = ? WHERE id = ?", 
-                     (datetime.now().isoformat(), user[0]))
-            conn.commit()
+            # Rehash with the current scheme/cost if the stored hash is outdated
+            new_hash = None
+            if pwd_context.needs_update(user['password_hash']):
+                new_hash = hash_password(password)
+            
+            with db_write() as conn:
+                # Update last login
+                conn.execute(_Q_USER_LAST_LOGIN, (datetime.now().isoformat(), user['id']))
+                if new_hash:
+                    conn.execute(_Q_USER_PASSWORD, (new_hash, user['id']))
             
             # Log login
             logger.info(f"User {username} logged in from {request.remote_addr}")
             
             return jsonify({'success': True, 'redirect': '/'})
         
-        conn.close()
         return jsonify({'success': False, 'error': 'Invalid credentials'}), 401
     
     return render_template('login.html')
@@ -241,85 +631,163 @@ def logout():
     session.clear()
     return redirect(url_for('login'))
 
+def get_system_status():
+    """Collect system status"""
+    # System info
+    status = {
+        'system': {},
+        'services': {},
+        'domains': [],
+        'backups': {},
+        'resources': {}
+    }
+    
+    # System info
+    with open('/proc/loadavg') as f:
+        load = f.read().strip().split()
+        status['system']['load'] = load[:3]
+    
+    # Memory
+    status['resources']['memory'] = get_memory_usage()
+    
+    # Disk
+    status['resources']['disk'] = get_disk_usage()
+    
+    # Services
+    status['services'] = get_services_status()
+    
+    # Domains from database
+    with db_read() as conn:
+        c = conn.cursor()
+        c.execute(_Q_DOMAINS_ACTIVE)
+        domains = c.fetchall()
+    
+    for domain in domains:
+        status['domains'].append({
+            'name': domain[0],
+            'type': domain[1],
+            'ssl': bool(domain[2]),
+            'created': domain[3]
+        })
+    
+    # Backup stats
+    if os.path.exists(BACKUP_DIR):
+        status['backups'].update(get_backup_stats())
+    
+    return status
+
 @app.route('/api/status')
 @login_required
 def system_status():
     """Get system status"""
+    # Shared by all dashboards for a few seconds
+    payload = cache_get('status:v1')
+    if payload is None:
+        try:
+            payload = orjson.dumps(get_system_status()).decode('utf-8')
+        except Exception as e:
+            logger.error(f"Error getting system status: {e}")
+            return jsonify({'error': str(e)}), 500
+        cache_set('status:v1', STATUS_CACHE_TTL, payload)
+    
+    response = Response(payload, mimetype='application/json')
+    response.set_etag(hashlib.md5(payload.encode('utf-8')).hexdigest())
+    return response.make_conditional(request)
+
+# ============================================
+# Background Jobs
+# ============================================
+
+JOB_TTL = 86400
+
+def _set_job(job_id, **fields):
+    """Update job state in Redis"""
     try:
-        # System info
-        status = {
-            'system': {},
-            'services': {},
-            'domains': [],
-            'backups': {},
-            'resources': {}
-        }
-        
-        # System info
-        with open('/proc/loadavg') as f:
-            load = f.read().strip().split()
-            status['system']['load'] = load[:3]
-        
-        # Memory
-        with open('/proc/meminfo') as f:
-            meminfo = {}
-            for line in f:
-                if 'MemTotal' in line or 'MemFree' in line or 'MemAvailable' in line:
-                    parts = line.split()
-                    meminfo[parts[0].strip(':')] = int(parts[1])
-            status['resources']['memory'] = meminfo
-        
-        # Disk
-        df = subprocess.check_output(['df', '-h', '/']).decode().split('\n')[1].split()
-        status['resources']['disk'] = {
-            'size': df[1],
-            'used': df[2],
-            'available': df[3],
-            'use_percent': df[4]
-        }
-        
-        # Services
-        services = ['nginx', 'mariadb', 'redis-server', 'memcached', 'fail2ban', 'php*-fpm']
-        for service in services:
-            try:
-                result = subprocess.run(['systemctl', 'is-active', service], 
-                                      capture_output=True, text=True)
-                status['services'][service] = result.stdout.strip()
-            except:
-                status['services'][service] = 'inactive'
-        
-        # Domains from database
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute("SELECT domain, type, ssl_enabled, created_at FROM domains WHERE status='active'")
-        domains = c.fetchall()
-        conn.close()
-        
-        for domain in domains:
-            status['domains'].append({
-                'name': domain[0],
-                'type': domain[1],
-                'ssl': bool(domain[2]),
-                'created': domain[3]
-            })
+        redis_client.hset(f'job:{job_id}', mapping={k: str(v) for k, v in fields.items()})
+        redis_client.expire(f'job:{job_id}', JOB_TTL)
+    except redis.RedisError as e:
+        logger.debug(f"Redis job update failed for {job_id}: {e}")
+
+def _run_bg(cmd, channel, meta, on_success=None):
+    """Run a command in a background thread and emit the result on channel"""
+    job_id = uuid.uuid4().hex
+    _set_job(job_id, status='running', **meta)
+    
+    def run():
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            success = result.returncode == 0
+            output = result.stdout if success else result.stderr
+            if success and on_success:
+                on_success()
+        except Exception as e:
+            success, output = False, str(e)
         
-        # Backup stats
-        backup_dir = BACKUP_DIR
-        if os.path.exists(backup_dir):
-            total_backups = 0
-            total_size = 0
-            for root, dirs, files in os.walk(backup_dir):
-                total_backups += len(files)
-                for file in files:
-                    total_size += os.path.getsize(os.path.join(root, file))
-            status['backups']['count'] = total_backups
-            status['backups']['size'] = total_size
+        _set_job(job_id, status='completed' if success else 'failed', output=output)
+        socketio.emit(channel, {**meta, 'job_id': job_id, 'success': success, 'output': output})
+    
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+    
+    return job_id
+
+# Only the tail of streamed output is kept for GET /api/jobs/<job_id>
+JOB_OUTPUT_LINES = 200
+
+# Output tails of running streamed jobs, replayed to late subscribers
+_job_tails = {}
+
+def _stream_bg(cmd, meta, on_done=None):
+    """Run a command in a background thread, streaming its output to the job's room"""
+    job_id = uuid.uuid4().hex
+    _set_job(job_id, status='running', **meta)
+    tail = _job_tails[job_id] = deque(maxlen=JOB_OUTPUT_LINES)
+    
+    def run():
+        try:
+            # Installer output isn't guaranteed UTF-8; a decode error here
+            # would close the pipe and kill the command midway
+            with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                  bufsize=1, encoding='utf-8', errors='replace') as proc:
+                for line in proc.stdout:
+                    tail.append(line)
+                    socketio.emit('cmd_output', {'job_id': job_id, 'line': line}, room=job_id)
+            success = proc.returncode == 0
+        except Exception as e:
+            success = False
+            tail.append(str(e))
+        finally:
+            if on_done:
+                on_done()
         
-        return jsonify(status)
+        output = ''.join(tail)
+        _set_job(job_id, status='completed' if success else 'failed', output=output)
+        _job_tails.pop(job_id, None)
+        socketio.emit('cmd_complete', {**meta, 'job_id': job_id, 'success': success}, room=job_id)
     
-    except Exception as e:
-        logger.error(f"Error getting system status: {e}")
-        return jsonify({'error': str(e)}), 500
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+    
+    return job_id
+
+# Running easyinstall invocations, keyed by (cmd, args), so an identical
+# request attaches to the existing job instead of racing it
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    """Get background job state"""
+    try:
+        job = redis_client.hgetall(f'job:{job_id}')
+    except redis.RedisError as e:
+        return jsonify({'error': str(e)}), 503
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
 
 # ============================================
 # Domain Management
@@ -329,25 +797,24 @@ def system_status():
 @login_required
 def list_domains():
     """List all domains"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT * FROM domains ORDER BY created_at DESC")
-    domains = c.fetchall()
-    conn.close()
+    with db_read() as conn:
+        c = conn.cursor()
+        c.execute(_Q_DOMAINS)
+        domains = c.fetchall()
     
     result = []
     for d in domains:
         result.append({
-            'id': d[0],
-            'domain': d[1],
-            'type': d[2],
-            'status': d[3],
-            'php_version': d[4],
-            'ssl': bool(d[5]),
-            'created': d[6]
+            'id': d['id'],
+            'domain': d['domain'],
+            'type': d['type'],
+            'status': d['status'],
+            'php_version': d['php_version'],
+            'ssl': bool(d['ssl_enabled']),
+            'created': d['created_at']
         })
     
-    return jsonify(result)
+    return jsonify_fast(result)
 
 @app.route('/api/domains', methods=['POST'])
 @login_required
@@ -361,7 +828,7 @@ def create_domain():
     
     # Run easyinstall command
     try:
-        cmd = ['easyinstall', 'create', domain]
+        cmd = [_EASYINSTALL, 'create', domain]
         if ssl:
             cmd.append('--ssl')
         
@@ -370,22 +837,20 @@ def create_domain():
         elif site_type == 'html':
             cmd.append('--html')
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        user_id = session['user_id']
         
-        if result.returncode == 0:
-            # Save to database
-            conn = sqlite3.connect(DB_PATH)
-            c = conn.cursor()
-            c.execute('''INSERT INTO domains (domain, type, php_version, ssl_enabled, user_id)
-                        VALUES (?, ?, ?, ?, ?)''',
-                     (domain, site_type, php_version, ssl, session['user_id']))
-            conn.commit()
-            conn.close()
-            
+        def save_domain():
+            with db_write() as conn:
+                c = conn.cursor()
+                c.execute(_Q_DOMAIN_INSERT,
+                         (domain, site_type, php_version, ssl, user_id))
+            cache_delete('status:v1')
             logger.info(f"Domain created: {domain}")
-            return jsonify({'success': True, 'output': result.stdout})
-        else:
-            return jsonify({'success': False, 'error': result.stderr}), 400
+        
+        # easyinstall + certbot can take minutes, so run in background
+        job_id = _run_bg(cmd, 'domain_create_complete', {'domain': domain}, on_success=save_domain)
+        
+        return jsonify({'success': True, 'job_id': job_id, 'message': 'Domain creation started'}), 202
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -395,19 +860,16 @@ def create_domain():
 def enable_ssl(domain):
     """Enable SSL for domain"""
     try:
-        result = subprocess.run(['easyinstall', 'site', domain, '--ssl=on'], 
-                               capture_output=True, text=True)
+        def mark_ssl():
+            with db_write() as conn:
+                c = conn.cursor()
+                c.execute(_Q_DOMAIN_SSL, (domain,))
+            cache_delete('status:v1')
         
-        if result.returncode == 0:
-            conn = sqlite3.connect(DB_PATH)
-            c = conn.cursor()
-            c.execute("UPDATE domains SET ssl_enabled = 1 WHERE domain = ?", (domain,))
-            conn.commit()
-            conn.close()
-            
-            return jsonify({'success': True, 'output': result.stdout})
-        else:
-            return jsonify({'success': False, 'error': result.stderr}), 400
+        job_id = _run_bg([_EASYINSTALL, 'site', domain, '--ssl=on'], 'ssl_enable_complete',
+                         {'domain': domain}, on_success=mark_ssl)
+        
+        return jsonify({'success': True, 'job_id': job_id, 'message': 'SSL setup started'}), 202
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -420,20 +882,22 @@ def delete_domain(domain):
         # First, check if it's a Docker site
         docker_path = f"/opt/easyinstall/docker/{domain}"
         if os.path.exists(docker_path):
-            result = subprocess.run(['easyinstall', 'docker', 'wordpress', 'delete', domain],
+            result = subprocess.run([_EASYINSTALL, 'docker', 'wordpress', 'delete', domain],
                                    capture_output=True, text=True)
         else:
-            result = subprocess.run(['rm', '-rf', f"/var/www/html/{domain}"], 
-                                   capture_output=True, text=True)
-            subprocess.run(['rm', '-f', f"/etc/nginx/sites-available/{domain}"])
-            subprocess.run(['rm', '-f', f"/etc/nginx/sites-enabled/{domain}"])
-            subprocess.run(['systemctl', 'reload', 'nginx'])
+            shutil.rmtree(f"/var/www/html/{domain}", ignore_errors=True)
+            for path in [f"/etc/nginx/sites-available/{domain}", f"/etc/nginx/sites-enabled/{domain}"]:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            # Don't hold the response for the reload
+            subprocess.Popen([_SYSTEMCTL, 'reload', 'nginx'])
         
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute("UPDATE domains SET status = 'deleted' WHERE domain = ?", (domain,))
-        conn.commit()
-        conn.close()
+        with db_write() as conn:
+            c = conn.cursor()
+            c.execute(_Q_DOMAIN_DELETE, (domain,))
+        cache_delete('status:v1')
         
         return jsonify({'success': True})
     
@@ -444,59 +908,122 @@ def delete_domain(domain):
 # Backup Management with Cloud Integration
 # ============================================
 
+# Multipart settings for S3 uploads - large backups upload parts in parallel
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True
+)
+
+# Streamed uploads buffer max_concurrency * multipart_chunksize in memory
+S3_STREAM_CONFIG = TransferConfig(
+    multipart_chunksize=32 * 1024 * 1024,
+    max_concurrency=4,
+    use_threads=True
+)
+
+@lru_cache(maxsize=32)
+def get_s3_client(access_key, secret_key, region):
+    """Create an S3 client, reused per credential set"""
+    return boto3.client(
+        's3',
+        aws_access_key_id=access_key,
+        aws_secret_access_key=secret_key,
+        region_name=region,
+        config=BotoConfig(max_pool_connections=50, retries={'max_attempts': 3, 'mode': 'adaptive'})
+    )
+
+class _CountingReader:
+    """File-like wrapper that counts bytes read from a stream"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.bytes_read = 0
+    
+    def read(self, size=-1):
+        # Pipes (raw under eventlet) return short reads; s3transfer sizes the
+        # upload from a single read(), so fill the request up to EOF
+        if size is None or size < 0:
+            data = self.stream.read()
+        else:
+            chunks = []
+            remaining = size
+            while remaining > 0:
+                chunk = self.stream.read(remaining)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                remaining -= len(chunk)
+            data = b''.join(chunks)
+        self.bytes_read += len(data)
+        return data
+
 class CloudBackupManager:
     """Manage backups to cloud providers"""
     
     def __init__(self, user_id):
         self.user_id = user_id
-        self.conn = sqlite3.connect(DB_PATH)
-        self.c = self.conn.cursor()
     
     def get_credentials(self, provider, default=False):
         """Get cloud credentials"""
-        if default:
-            self.c.execute('''SELECT credentials FROM cloud_credentials 
-                            WHERE user_id = ? AND is_default = 1''', (self.user_id,))
-        else:
-            self.c.execute('''SELECT credentials FROM cloud_credentials 
-                            WHERE user_id = ? AND provider = ?''', (self.user_id, provider))
-        result = self.c.fetchone()
+        with db_read() as conn:
+            if default:
+                result = conn.execute(_Q_CREDS_DEFAULT, (self.user_id,)).fetchone()
+            else:
+                result = conn.execute(_Q_CREDS_BY_PROVIDER, (self.user_id, provider)).fetchone()
         if result:
-            return json.loads(result[0])
+            return orjson.loads(result[0])
         return None
     
     def save_credentials(self, provider, credentials, name=None, make_default=False):
         """Save cloud credentials"""
-        cred_json = json.dumps(credentials)
-        
-        if make_default:
-            self.c.execute('''UPDATE cloud_credentials SET is_default = 0 
-                            WHERE user_id = ?''', (self.user_id,))
+        cred_json = orjson.dumps(credentials).decode('utf-8')
         
-        self.c.execute('''INSERT OR REPLACE INTO cloud_credentials 
-                        (user_id, provider, credentials, name, is_default)
-                        VALUES (?, ?, ?, ?, ?)''',
-                     (self.user_id, provider, cred_json, name, make_default))
-        self.conn.commit()
+        with db_write() as conn:
+            if make_default:
+                conn.execute(_Q_CREDS_CLEAR_DEFAULT, (self.user_id,))
+            
+            conn.execute(_Q_CREDS_SAVE,
+                         (self.user_id, provider, cred_json, name, make_default))
     
-    def backup_to_s3(self, backup_file, bucket_name, prefix=''):
-        """Upload backup to S3"""
+    def _s3_client(self):
+        """Get an S3 client for saved credentials"""
         creds = self.get_credentials('s3')
         if not creds:
             raise Exception("S3 credentials not configured")
         
-        s3 = boto3.client(
-            's3',
-            aws_access_key_id=creds['access_key'],
-            aws_secret_access_key=creds['secret_key'],
-            region_name=creds.get('region', 'us-east-1')
-        )
+        return get_s3_client(creds['access_key'], creds['secret_key'], creds.get('region', 'us-east-1'))
+    
+    def backup_to_s3(self, backup_file, bucket_name, prefix=''):
+        """Upload backup to S3"""
+        s3 = self._s3_client()
         
         key = f"{prefix}/{os.path.basename(backup_file)}"
-        s3.upload_file(backup_file, bucket_name, key)
+        s3.upload_file(backup_file, bucket_name, key, Config=S3_TRANSFER_CONFIG)
         
         return f"s3://{bucket_name}/{key}"
     
+    def stream_to_s3(self, backup_name, bucket_name, prefix=''):
+        """Stream a new backup to S3 without staging it on disk"""
+        s3 = self._s3_client()
+        key = f"{prefix}/{backup_name}"
+        
+        proc = subprocess.Popen([_EASYINSTALL, 'backup', '--output', '-'],
+                                stdout=subprocess.PIPE)
+        reader = _CountingReader(proc.stdout)
+        try:
+            s3.upload_fileobj(reader, bucket_name, key, Config=S3_STREAM_CONFIG)
+        finally:
+            proc.stdout.close()
+            returncode = proc.wait()
+        
+        if returncode != 0:
+            # Don't leave a truncated archive behind
+            s3.delete_object(Bucket=bucket_name, Key=key)
+            raise subprocess.CalledProcessError(returncode, proc.args)
+        
+        return f"s3://{bucket_name}/{key}", reader.bytes_read
+    
     def backup_to_gdrive(self, backup_file, folder_id=None):
         """Upload backup to Google Drive"""
         creds = self.get_credentials('gdrive')
@@ -508,7 +1035,7 @@ class CloudBackupManager:
         from googleapiclient.http import MediaFileUpload
         
         g_creds = Credentials.from_authorized_user_info(creds)
-        service = build('drive', 'v3', credentials=g_creds)
+        service = build('drive', 'v3', credentials=g_creds, cache_discovery=False)
         
         file_metadata = {'name': os.path.basename(backup_file)}
         if folder_id:
@@ -529,47 +1056,77 @@ class CloudBackupManager:
         
         return f"rclone://{remote_name}:{remote_path}/{os.path.basename(backup_file)}"
     
-    def create_backup(self, job_id=None):
+    def _upload_one(self, provider, config, backup_file):
+        """Upload backup to a single destination"""
+        if provider == 's3':
+            return self.backup_to_s3(backup_file, config['bucket'], config.get('prefix', ''))
+        elif provider == 'gdrive':
+            return self.backup_to_gdrive(backup_file, config.get('folder_id'))
+        elif provider == 'rclone':
+            return self.backup_to_rclone(backup_file, config['remote'], config['path'])
+        raise Exception(f"Unknown provider: {provider}")
+    
+    def create_backup(self, job_id=None, keep_local=True):
         """Create and upload backup"""
         timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
-        backup_file = f"{TEMP_DIR}/backup-{timestamp}.tar.gz"
-        
-        # Create backup
-        subprocess.run(['easyinstall', 'backup', '--output', backup_file], check=True)
-        
-        # Upload to cloud if configured
-        locations = []
+        backup_name = f"backup-{timestamp}.tar.gz"
+        backup_file = None
         
         # Check for default cloud destination
-        dest = self.c.execute('''SELECT destination FROM backup_jobs WHERE id = ?''', (job_id,)).fetchone()
-        if dest and dest[0]:
-            dest_config = json.loads(dest[0])
-            for provider, config in dest_config.items():
-                try:
-                    if provider == 's3':
-                        url = self.backup_to_s3(backup_file, config['bucket'], config.get('prefix', ''))
-                    elif provider == 'gdrive':
-                        url = self.backup_to_gdrive(backup_file, config.get('folder_id'))
-                    elif provider == 'rclone':
-                        url = self.backup_to_rclone(backup_file, config['remote'], config['path'])
-                    
-                    locations.append(url)
-                    logger.info(f"Backup uploaded to {provider}: {url}")
-                except Exception as e:
-                    logger.error(f"Failed to upload to {provider}: {e}")
+        with db_read() as conn:
+            dest = conn.execute(_Q_JOB_DESTINATION, (job_id,)).fetchone()
+        dest_config = orjson.loads(dest[0]) if dest and dest[0] else {}
+        
+        if not keep_local and list(dest_config) == ['s3']:
+            # Single S3 destination - pipe the archive straight into a multipart upload
+            config = dest_config['s3']
+            url, file_size = self.stream_to_s3(backup_name, config['bucket'], config.get('prefix', ''))
+            locations = [url]
+            logger.info(f"Backup streamed to s3: {url}")
+        else:
+            backup_file = f"{TEMP_DIR}/{backup_name}"
+            
+            # Create backup
+            subprocess.run([_EASYINSTALL, 'backup', '--output', backup_file], check=True)
+            
+            # Upload to cloud if configured
+            locations = self._upload_all(dest_config, backup_file)
+            file_size = os.path.getsize(backup_file)
+            
+            # Drop the staged copy once it is stored somewhere else
+            if not keep_local and locations:
+                os.unlink(backup_file)
+                backup_file = None
         
         # Save to backup history
-        file_size = os.path.getsize(backup_file)
-        locations_json = json.dumps(locations)
+        locations_json = orjson.dumps(locations).decode('utf-8')
         
-        self.c.execute('''INSERT INTO backup_history 
-                        (job_id, start_time, end_time, size, status, location)
-                        VALUES (?, ?, ?, ?, ?, ?)''',
-                     (job_id, timestamp, datetime.now().isoformat(), 
-                      file_size, 'completed', locations_json))
-        self.conn.commit()
+        with db_write() as conn:
+            conn.execute(_Q_HISTORY_INSERT,
+                         (job_id, timestamp, datetime.now().isoformat(), 
+                          file_size, 'completed', locations_json))
         
-        return backup_file, locations
+        return backup_file, file_size, locations
+    
+    def _upload_all(self, dest_config, backup_file):
+        """Upload backup to every configured destination"""
+        locations = []
+        if dest_config:
+            # Uploads are independent, so run them concurrently
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                futures = {
+                    executor.submit(self._upload_one, provider, config, backup_file): provider
+                    for provider, config in dest_config.items()
+                }
+                for future in as_completed(futures):
+                    provider = futures[future]
+                    try:
+                        url = future.result()
+                        locations.append(url)
+                        logger.info(f"Backup uploaded to {provider}: {url}")
+                    except Exception as e:
+                        logger.error(f"Failed to upload to {provider}: {e}")
+        return locations
 
 @app.route('/api/backups/create', methods=['POST'])
 @login_required
@@ -581,12 +1138,15 @@ def create_backup():
     
     try:
         manager = CloudBackupManager(session['user_id'])
-        backup_file, locations = manager.create_backup()
+        backup_file, file_size, locations = manager.create_backup(
+            job_id=data.get('job_id'),
+            keep_local=data.get('keep_local', True)
+        )
         
         return jsonify({
             'success': True,
             'file': backup_file,
-            'size': os.path.getsize(backup_file),
+            'size': file_size,
             'locations': locations
         })
     
@@ -602,66 +1162,62 @@ def list_backups():
     
     # Local backups
     if os.path.exists(BACKUP_DIR):
-        for root, dirs, files in os.walk(BACKUP_DIR):
-            for file in files:
-                if file.endswith('.tar.gz') or file.endswith('.sql'):
-                    path = os.path.join(root, file)
-                    backups.append({
-                        'name': file,
-                        'path': path,
-                        'size': os.path.getsize(path),
-                        'modified': datetime.fromtimestamp(os.path.getmtime(path)).isoformat(),
-                        'type': 'local'
-                    })
+        for entry in walk_scandir(BACKUP_DIR):
+            if entry.name.endswith(('.tar.gz', '.sql')):
+                st = entry.stat()
+                backups.append({
+                    'name': entry.name,
+                    'path': entry.path,
+                    'size': st.st_size,
+                    'modified': datetime.fromtimestamp(st.st_mtime).isoformat(),
+                    'type': 'local'
+                })
     
     # Cloud backup history
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''SELECT * FROM backup_history ORDER BY start_time DESC LIMIT 50''')
-    history = c.fetchall()
-    conn.close()
+    with db_read() as conn:
+        c = conn.cursor()
+        c.execute(_Q_HISTORY)
+        history = c.fetchall()
     
     for h in history:
         backups.append({
-            'id': h[0],
-            'start_time': h[2],
-            'end_time': h[3],
-            'size': h[4],
-            'status': h[5],
-            'message': h[6],
-            'locations': json.loads(h[7]) if h[7] else [],
+            'id': h['id'],
+            'start_time': h['start_time'],
+            'end_time': h['end_time'],
+            'size': h['size'],
+            'status': h['status'],
+            'message': h['message'],
+            'locations': orjson.loads(h['location']) if h['location'] else [],
             'type': 'cloud'
         })
     
-    return jsonify(backups)
+    return jsonify_fast(backups)
 
 @app.route('/api/backups/jobs', methods=['GET'])
 @login_required
 def list_backup_jobs():
     """List backup jobs"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''SELECT * FROM backup_jobs WHERE user_id = ? ORDER BY created_at DESC''', 
-             (session['user_id'],))
-    jobs = c.fetchall()
-    conn.close()
+    with db_read() as conn:
+        c = conn.cursor()
+        c.execute(_Q_JOBS, (session['user_id'],))
+        jobs = c.fetchall()
     
     result = []
     for job in jobs:
         result.append({
-            'id': job[0],
-            'name': job[1],
-            'type': job[2],
-            'source': job[3],
-            'destination': json.loads(job[4]) if job[4] else {},
-            'schedule': job[5],
-            'retention_days': job[6],
-            'last_run': job[7],
-            'next_run': job[8],
-            'status': job[9]
+            'id': job['id'],
+            'name': job['name'],
+            'type': job['type'],
+            'source': job['source'],
+            'destination': orjson.loads(job['destination']) if job['destination'] else {},
+            'schedule': job['schedule'],
+            'retention_days': job['retention_days'],
+            'last_run': job['last_run'],
+            'next_run': job['next_run'],
+            'status': job['status']
         })
     
-    return jsonify(result)
+    return jsonify_fast(result)
 
 @app.route('/api/backups/jobs', methods=['POST'])
 @login_required
@@ -669,17 +1225,13 @@ def create_backup_job():
     """Create a scheduled backup job"""
     data = request.json
     
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''INSERT INTO backup_jobs 
-                (name, type, source, destination, schedule, retention_days, user_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?)''',
-             (data['name'], data['type'], data.get('source'), 
-              json.dumps(data.get('destination', {})),
-              data.get('schedule'), data.get('retention_days', 30), 
-              session['user_id']))
-    conn.commit()
-    conn.close()
+    with db_write() as conn:
+        c = conn.cursor()
+        c.execute(_Q_JOB_INSERT,
+                 (data['name'], data['type'], data.get('source'), 
+                  orjson.dumps(data.get('destination', {})).decode('utf-8'),
+                  data.get('schedule'), data.get('retention_days', 30), 
+                  session['user_id']))
     
     return jsonify({'success': True})
 
@@ -757,39 +1309,59 @@ def cloud_status():
 # Docker Management
 # ============================================
 
+DOCKER_BASE = '/opt/easyinstall/docker'
+
+def get_compose_projects():
+    """Map compose project directories to their status, None if docker is unavailable"""
+    try:
+        out = subprocess.check_output(['docker', 'compose', 'ls', '--format', 'json', '--all'])
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    
+    projects = {}
+    for project in orjson.loads(out):
+        for config_file in project.get('ConfigFiles', '').split(','):
+            projects[os.path.dirname(config_file)] = project.get('Status', '')
+    return projects
+
+def _compose_status(state):
+    """Summarize a compose status string such as 'running(2), exited(1)'"""
+    if state is None:
+        return 'stopped'
+    parts = [part.strip() for part in state.split(',')]
+    if all(part.startswith('running') for part in parts):
+        return 'running'
+    if any(part.startswith('running') for part in parts):
+        return 'partial'
+    return 'stopped'
+
 @app.route('/api/docker/installations', methods=['GET'])
 @login_required
 def list_docker_installations():
     """List Docker WordPress installations"""
     installations = []
     
-    docker_base = '/opt/easyinstall/docker'
-    if os.path.exists(docker_base):
-        for domain in os.listdir(docker_base):
-            path = os.path.join(docker_base, domain)
-            if os.path.isdir(path) and os.path.exists(os.path.join(path, 'docker-compose.yml')):
-                # Get container status
-                try:
-                    result = subprocess.run(
-                        ['docker-compose', '-f', f'{path}/docker-compose.yml', 'ps', '--format', 'json'],
-                        capture_output=True, text=True, cwd=path
-                    )
-                    containers = json.loads(result.stdout) if result.stdout else []
-                    
-                    status = 'running'
-                    for container in containers:
-                        if 'Up' not in container.get('Status', ''):
-                            status = 'partial'
-                            break
-                except:
-                    status = 'unknown'
-                
-                installations.append({
-                    'domain': domain,
-                    'path': path,
-                    'status': status,
-                    'type': 'docker'
-                })
+    if os.path.exists(DOCKER_BASE):
+        # One docker query for all projects, run while the directory is scanned
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            projects_future = executor.submit(get_compose_projects)
+            with os.scandir(DOCKER_BASE) as it:
+                sites = [entry for entry in it
+                         if entry.is_dir() and os.path.exists(os.path.join(entry.path, 'docker-compose.yml'))]
+            projects = projects_future.result()
+        
+        for entry in sites:
+            if projects is None:
+                status = 'unknown'
+            else:
+                status = _compose_status(projects.get(entry.path))
+            
+            installations.append({
+                'domain': entry.name,
+                'path': entry.path,
+                'status': status,
+                'type': 'docker'
+            })
     
     return jsonify(installations)
 
@@ -803,24 +1375,14 @@ def install_docker_wordpress():
     
     try:
         # Run docker installation
-        cmd = ['easyinstall', 'docker', 'wordpress', 'install', domain]
+        cmd = [_EASYINSTALL, 'docker', 'wordpress', 'install', domain]
         if ssl:
             cmd.append('--ssl')
         
         # Run in background
-        def run_install():
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            socketio.emit('docker_install_complete', {
-                'domain': domain,
-                'success': result.returncode == 0,
-                'output': result.stdout if result.returncode == 0 else result.stderr
-            })
+        job_id = _run_bg(cmd, 'docker_install_complete', {'domain': domain})
         
-        thread = threading.Thread(target=run_install)
-        thread.daemon = True
-        thread.start()
-        
-        return jsonify({'success': True, 'message': 'Installation started'})
+        return jsonify({'success': True, 'job_id': job_id, 'message': 'Installation started'})
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -833,18 +1395,35 @@ def install_docker_wordpress():
 @login_required
 def run_command(cmd):
     """Run easyinstall command"""
+    if cmd not in _ALLOWED_CMDS:
+        return jsonify({'success': False, 'error': 'Unknown command'}), 400
+    
     data = request.json
     args = data.get('args', [])
+    if not isinstance(args, list) or not all(isinstance(a, str) for a in args):
+        return jsonify({'success': False, 'error': 'Invalid args'}), 400
+    if cmd == 'backup' and (len(args) > 1 or not set(args) <= _BACKUP_TYPES):
+        return jsonify({'success': False, 'error': 'Invalid backup type'}), 400
     
     try:
-        full_cmd = ['easyinstall', cmd] + args
-        result = subprocess.run(full_cmd, capture_output=True, text=True)
+        full_cmd = [_EASYINSTALL, cmd] + args
+        key = (cmd, tuple(args))
         
-        return jsonify({
-            'success': result.returncode == 0,
-            'stdout': result.stdout,
-            'stderr': result.stderr
-        })
+        def release():
+            with _inflight_lock:
+                _inflight.pop(key, None)
+        
+        with _inflight_lock:
+            existing = _inflight.get(key)
+            if existing:
+                return jsonify({'success': True, 'job_id': existing, 'deduped': True}), 202
+            
+            # Output is streamed as cmd_output events to clients that
+            # subscribe_job to the returned job id
+            job_id = _stream_bg(full_cmd, {'cmd': cmd}, on_done=release)
+            _inflight[key] = job_id
+        
+        return jsonify({'success': True, 'job_id': job_id}), 202
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -853,9 +1432,15 @@ def run_command(cmd):
 @login_required
 def service_action(name, action):
     """Control system services"""
+    if name not in resolve_services():
+        return jsonify({'success': False, 'error': 'Unknown service'}), 400
+    
     try:
         if action in ['start', 'stop', 'restart', 'reload', 'status']:
-            result = subprocess.run(['systemctl', action, name], capture_output=True, text=True)
+            result = subprocess.run([_SYSTEMCTL, action, name], capture_output=True, text=True)
+            if result.returncode == 0 and action != 'status':
+                # Show the new state on the next poll
+                _svc_cache['t'] = 0.0
             return jsonify({
                 'success': result.returncode == 0,
                 'output': result.stdout,
@@ -876,65 +1461,132 @@ def handle_connect():
     """Handle client connection"""
     emit('connected', {'data': 'Connected to EasyInstall WebUI'})
 
-@socketio.on('subscribe_status')
-def handle_status_subscribe():
-    """Subscribe to real-time status updates"""
-    def status_updater():
-        while True:
-            # Get system stats
+@socketio.on('disconnect')
+def handle_disconnect():
+    """Handle client disconnection"""
+    leave_room('status')
+
+# One updater broadcasts to every subscriber in the 'status' room
+_updater_lock = threading.Lock()
+_updater_started = False
+
+def status_updater():
+    """Broadcast system stats to status subscribers"""
+    while True:
+        # A failed tick must not end the only updater
+        try:
             stats = {
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': time.time(),
                 'cpu': get_cpu_usage(),
                 'memory': get_memory_usage(),
                 'disk': get_disk_usage(),
                 'services': get_services_status()
             }
-            socketio.emit('status_update', stats)
-            time.sleep(5)
+            socketio.emit('status_update', stats, room='status')
+        except Exception:
+            logger.exception("Status update failed")
+        socketio.sleep(5)
+
+@socketio.on('subscribe_status')
+def handle_status_subscribe():
+    """Subscribe to real-time status updates"""
+    global _updater_started
+    join_room('status')
     
-    thread = threading.Thread(target=status_updater)
-    thread.daemon = True
-    thread.start()
+    with _updater_lock:
+        if not _updater_started:
+            socketio.start_background_task(status_updater)
+            _updater_started = True
+
+@socketio.on('subscribe_job')
+def handle_job_subscribe(data):
+    """Subscribe to output of a background command"""
+    job_id = (data or {}).get('job_id')
+    if not job_id or 'user_id' not in session:
+        return
+    join_room(job_id)
+    
+    # The client can only subscribe after the job starts, so replay what
+    # it missed: the live tail while running, the stored result once done
+    tail = _job_tails.get(job_id)
+    if tail is not None:
+        for line in list(tail):
+            emit('cmd_output', {'job_id': job_id, 'line': line})
+        return
+    
+    try:
+        job = redis_client.hgetall(f'job:{job_id}')
+    except redis.RedisError as e:
+        logger.debug(f"Redis job read failed for {job_id}: {e}")
+        return
+    if job.get('status') in ('completed', 'failed'):
+        emit('cmd_output', {'job_id': job_id, 'line': job.get('output', '')})
+        emit('cmd_complete', {'job_id': job_id, 'cmd': job.get('cmd'),
+                              'success': job['status'] == 'completed'})
+
+# /proc files stay open for the life of the process; pread() from offset 0
+# re-reads them without another open/close
+_STAT_FD = os.open('/proc/stat', os.O_RDONLY)
+_MEMINFO_FD = os.open('/proc/meminfo', os.O_RDONLY)
+_MEMINFO_WANTED = frozenset((b'MemTotal:', b'MemFree:', b'MemAvailable:'))
 
 def get_cpu_usage():
     """Get CPU usage percentage"""
-    with open('/proc/stat') as f:
-        line = f.readline().split()
-        total = sum(int(x) for x in line[1:])
-        idle = int(line[4])
+    line = os.pread(_STAT_FD, 256, 0).split(b'\n', 1)[0].split()
+    fields = list(map(int, line[1:]))
+    total = sum(fields)
+    idle = fields[3]
     return {'total': total, 'idle': idle}
 
 def get_memory_usage():
     """Get memory usage"""
-    with open('/proc/meminfo') as f:
-        meminfo = {}
-        for line in f:
-            if 'MemTotal' in line or 'MemFree' in line or 'MemAvailable' in line:
-                parts = line.split()
-                meminfo[parts[0].strip(':')] = int(parts[1])
+    # MemTotal, MemFree and MemAvailable are the first lines of the file
+    data = os.pread(_MEMINFO_FD, 256, 0)
+    meminfo = {}
+    for line in data.split(b'\n'):
+        parts = line.split()
+        if parts and parts[0] in _MEMINFO_WANTED:
+            meminfo[parts[0][:-1].decode()] = int(parts[1])
+            if len(meminfo) == len(_MEMINFO_WANTED):
+                break
     return meminfo
 
 def get_disk_usage():
     """Get disk usage"""
-    df = subprocess.check_output(['df', '-h', '/']).decode().split('\n')[1].split()
+    # Same figures as df -h /, from a single syscall
+    st = os.statvfs('/')
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    available = st.f_bavail * st.f_frsize
     return {
-        'size': df[1],
-        'used': df[2],
-        'available': df[3],
-        'use_percent': df[4]
+        'size': _human(st.f_blocks * st.f_frsize),
+        'used': _human(used),
+        'available': _human(available),
+        'use_percent': f'{math.ceil(used * 100 / ((used + available) or 1))}%'
     }
 
+# Service states rarely change, so polls within the TTL reuse the last result
+SERVICES_CACHE_TTL = 15
+_svc_cache = {'t': 0.0, 'v': {}}
+
 def get_services_status():
     """Get services status"""
-    services = {}
-    for service in ['nginx', 'mariadb', 'redis-server', 'memcached', 'fail2ban', 'php*-fpm']:
-        try:
-            result = subprocess.run(['systemctl', 'is-active', service], 
-                                  capture_output=True, text=True)
-            services[service] = result.stdout.strip()
-        except:
-            services[service] = 'inactive'
-    return services
+    now = time.monotonic()
+    if now - _svc_cache['t'] < SERVICES_CACHE_TTL:
+        return _svc_cache['v']
+    
+    # systemctl prints one state per unit, in order
+    units = resolve_services()
+    try:
+        result = subprocess.run([_SYSTEMCTL, 'is-active', '--', *units],
+                                capture_output=True, text=True)
+        states = result.stdout.splitlines()
+    except OSError:
+        states = []
+    states += ['inactive'] * (len(units) - len(states))
+    
+    _svc_cache['v'] = dict(zip(units, states))
+    _svc_cache['t'] = now
+    return _svc_cache['v']
 
 # ============================================
 # User Management
@@ -944,24 +1596,10 @@ def get_services_status():
 @admin_required
 def list_users():
     """List all users"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT id, username, email, role, created_at, last_login FROM users")
-    users = c.fetchall()
-    conn.close()
+    with db_read() as conn:
+        result = [dict(row) for row in conn.execute(_Q_USERS)]
     
-    result = []
-    for user in users:
-        result.append({
-            'id': user[0],
-            'username': user[1],
-            'email': user[2],
-            'role': user[3],
-            'created_at': user[4],
-            'last_login': user[5]
-        })
-    
-    return jsonify(result)
+    return jsonify_fast(result)
 
 @app.route('/api/users', methods=['POST'])
 @admin_required
@@ -973,21 +1611,19 @@ def create_user():
     email = data.get('email')
     role = data.get('role', 'user')
     
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-    
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+    password_hash = hash_password(password)
     
-    try:
-        c.execute('''INSERT INTO users (username, password_hash, email, role)
-                    VALUES (?, ?, ?, ?)''',
-                 (username, password_hash, email, role))
-        conn.commit()
-        return jsonify({'success': True})
-    except sqlite3.IntegrityError:
-        return jsonify({'success': False, 'error': 'Username already exists'}), 400
-    finally:
-        conn.close()
+    with db_write() as conn:
+        c = conn.cursor()
+        
+        # Let the UNIQUE index on username reject duplicates; checking with a
+        # SELECT first would descend the same index twice
+        try:
+            c.execute(_Q_USER_INSERT,
+                     (username, password_hash, email, role))
+            return jsonify({'success': True})
+        except sqlite3.IntegrityError:
+            return jsonify({'success': False, 'error': 'Username already exists'}), 400
 
 @app.route('/api/users/<int:user_id>', methods=['DELETE'])
 @admin_required
@@ -996,11 +1632,11 @@ def delete_user(user_id):
     if user_id == session['user_id']:
         return jsonify({'success': False, 'error': 'Cannot delete yourself'}), 400
     
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("DELETE FROM users WHERE id = ?", (user_id,))
-    conn.commit()
-    conn.close()
+    with db_write() as conn:
+        c = conn.cursor()
+        c.execute(_Q_USER_DELETE, (user_id,))
+    
+    cache_delete(f'role:{user_id}')
     
     return jsonify({'success': True})
 
@@ -1012,11 +1648,10 @@ def delete_user(user_id):
 @login_required
 def get_settings():
     """Get settings"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT key, value FROM settings")
-    settings = dict(c.fetchall())
-    conn.close()
+    with db_read() as conn:
+        c = conn.cursor()
+        c.execute(_Q_SETTINGS)
+        settings = dict(c.fetchall())
     
     return jsonify(settings)
 
@@ -1026,16 +1661,11 @@ def update_settings():
     """Update settings"""
     data = request.json
     
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+    now = datetime.now().isoformat()
+    rows = [(key, value, now) for key, value in data.items()]
     
-    for key, value in data.items():
-        c.execute('''INSERT OR REPLACE INTO settings (key, value, updated_at)
-                    VALUES (?, ?, ?)''',
-                 (key, value, datetime.now().isoformat()))
-    
-    conn.commit()
-    conn.close()
+    with db_write() as conn:
+        conn.executemany(_Q_SETTING_SAVE, rows)
     
     return jsonify({'success': True})
 
@@ -1044,4 +1674,11 @@ def update_settings():
 # ============================================
 
 if __name__ == '__main__':
+    if sys.argv[1:] == ['create-admin']:
+        # Never echo the password; it may be captured by whoever ran us
+        create_admin()
+        BCRYPT_POOL.shutdown()
+        print(f"Admin password reset; credentials saved to {DATA_DIR}/admin_credentials.txt")
+        sys.exit(0)
+    
     socketio.run(app, host='0.0.0.0', port=5000, debug=False)
@@ -25,7 +25,7 @@ fi
 echo -e "${YELLOW}📦 Installing Python packages...${NC}"
 apt update
 apt install -y python3-pip python3-venv nginx redis-server
-pip3 install flask flask-socketio flask-login bcrypt paramiko boto3 google-auth google-auth-oauthlib google-auth-httplib2 googleapiclient redis gunicorn eventlet
+pip3 install flask flask-socketio flask-session flask-login "bcrypt<4.1" passlib argon2-cffi paramiko boto3 google-auth google-auth-oauthlib google-auth-httplib2 googleapiclient redis orjson gunicorn eventlet
 
 # Create directories
 echo -e "${YELLOW}📁 Creating directories...${NC}"
@@ -49,7 +49,7 @@ After=network.target redis.service
 Type=simple
 User=root
 WorkingDirectory=/opt/easyinstall-webui/app
-ExecStart=/usr/local/bin/gunicorn -w 4 -k eventlet -b 127.0.0.1:5000 app:app
+ExecStart=/usr/local/bin/gunicorn -w 1 -k eventlet -b 127.0.0.1:5000 app:app
 Restart=always
 RestartSec=10
 StandardOutput=append:/var/log/easyinstall/webui.log